@@ -1,3 +1,4 @@
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -9,10 +10,14 @@ class Database:
     _session_factory = None
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
+    def initialize(cls, database_url: str, echo: bool = False, statement_cache_size: int = 256):
         """Initialize the async engine and sessionmaker."""
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            url = make_url(database_url)
+            if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+                # Keep prepared statements for the service's hot queries cached on each asyncpg connection
+                url = url.update_query_dict({"prepared_statement_cache_size": str(statement_cache_size)})
+            cls._engine = create_async_engine(url, echo=echo, future=True)
             cls._session_factory = sessionmaker(
                 bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
             )
@@ -1,4 +1,5 @@
 from builtins import Exception, dict, str
+from functools import lru_cache
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +9,7 @@ from app.services.jwt_service import decode_token
 from settings.config import Settings
 from fastapi import Depends
 
+@lru_cache
 def get_settings() -> Settings:
     """Return application settings."""
     return Settings()
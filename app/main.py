@@ -6,6 +6,8 @@ from app.database import Database
 from app.dependencies import get_settings
 from app.services.user_service import UserService
 from app.routers import user_routes
+from app.utils.cache import redis_client
+from app.utils.security import shutdown_hash_pool
 from app.utils.api_description import getDescription
 
 app = FastAPI(
@@ -33,11 +35,16 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(settings.database_url, settings.debug, settings.db_statement_cache_size)
     async_session_factory = Database.get_session_factory()
     async with async_session_factory() as session:
         await UserService.create_default_db_admin(session)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await redis_client.aclose()
+    shutdown_hash_pool()
+
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
     return JSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
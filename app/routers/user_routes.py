@@ -18,10 +18,11 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
+from builtins import dict, int, len, max, str
 from datetime import timedelta
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_current_user, get_db, get_notification_service, require_role
@@ -30,7 +31,7 @@ from app.schemas.token_schema import TokenResponse
 from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
 from app.services.user_service import UserService
 from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.utils.link_generation import create_user_links, generate_cursor_pagination_links
 from app.dependencies import get_settings
 from app.services.notification_service import NotificationService
 
@@ -184,26 +185,27 @@ async def create_user(user: UserCreate, request: Request, session: AsyncSession
 @router.get("/users/", response_model=UserListResponse, tags=["User Management Requires (Admin or Manager Roles)"])
 async def list_users(
     request: Request,
-    skip: int = 0,
-    limit: int = 10,
+    after_id: Optional[UUID] = None,
+    limit: int = Query(10, ge=1),
     session: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(session)
-    users = await UserService.list_users(session, skip, limit)
+    users, next_cursor = await UserService.list_users(session, after_id, limit)
+    # The estimate can lag behind recent inserts; never report fewer users than this page holds
+    total_users = max(await UserService.count_estimate(session), len(users))
 
     user_responses = [
         UserResponse.model_validate(user) for user in users
     ]
     
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
+    pagination_links = generate_cursor_pagination_links(request, after_id, limit, next_cursor)
     
     # Construct the final response with pagination details
     return UserListResponse(
         items=user_responses,
         total=total_users,
-        page=skip // limit + 1,
         size=len(user_responses),
+        next_cursor=next_cursor,
         links=pagination_links  # Ensure you have appropriate logic to create these links
     )
 
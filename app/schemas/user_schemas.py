@@ -6,6 +6,7 @@ from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
 
 class UserBase(BaseModel):
     email: EmailStr = Field(..., example="john.doe@example.com")
@@ -85,5 +86,6 @@ class UserListResponse(BaseModel):
         "github_profile_url": "https://github.com/johndoe"
     }])
     total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
     size: int = Field(..., example=10)
+    next_cursor: Optional[uuid.UUID] = Field(None, example=uuid.uuid4())
+    links: List[PaginationLink] = []
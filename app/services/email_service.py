@@ -1,12 +1,31 @@
 from builtins import ValueError, dict, str
+import asyncio
+import logging
 
 from app.utils.template_manager import EmailTemplateManager
 from app.utils.tasks import send_user_email
 
+logger = logging.getLogger(__name__)
+
 class EmailService:
     def __init__(self):
         self.template_manager = EmailTemplateManager()
 
     def send_email(self, email_type: str, subject: str, user_data: dict):
+        """Queue an email without holding up the request; inside the event loop the work runs in a thread."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._send_email(email_type, subject, user_data)
+            return
+        future = loop.run_in_executor(None, self._send_email, email_type, subject, user_data)
+        future.add_done_callback(self._log_failure)
+
+    def _send_email(self, email_type: str, subject: str, user_data: dict):
         html_content = self.template_manager.render_template(email_type, **user_data)
         send_user_email.delay(subject, html_content, user_data['email'])
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Failed to queue email: {future.exception()}")
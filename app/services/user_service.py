@@ -1,16 +1,21 @@
 from builtins import Exception, bool, classmethod, int, str
-from datetime import datetime, timezone
+from datetime import timedelta
+from functools import lru_cache
 import secrets
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete as sa_delete, func, insert, inspect, null, or_, update, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_settings
 from app.models.user_model import User
 from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.cache import UserCache
+from app.utils.security import hash_password, hash_password_async, needs_rehash, verify_password_async
 from uuid import UUID
 from app.services.notification_service import NotificationService
 from app.models.user_model import UserRole
@@ -20,15 +25,37 @@ settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
-DB_ADMIN = User(nickname=settings.admin_user,
+@lru_cache(maxsize=1)
+def _get_db_admin_values() -> Dict:
+    """Column values of the default admin user, hashing its password only on first use."""
+    return dict(nickname=settings.admin_user,
                 email=settings.admin_email,
                 hashed_password=hash_password(settings.admin_password),
                 role=UserRole.ADMIN,
-                email_verified=True)
+                email_verified=True,
+                verification_token=None)
+
+_dummy_hash: Optional[str] = None
+
+async def _get_dummy_hash() -> str:
+    """Reference hash verified against when logging in with an unknown email, computed off the event loop on first use."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password_async("x" * 16)
+    return _dummy_hash
 
 class UserService:
     @classmethod
-    async def _execute_query(cls, session: AsyncSession, query):
+    async def _execute_read(cls, session: AsyncSession, query):
+        try:
+            return await session.execute(query)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {e}")
+            await session.rollback()
+            return None
+
+    @classmethod
+    async def _execute_write(cls, session: AsyncSession, query):
         try:
             result = await session.execute(query)
             await session.commit()
@@ -41,12 +68,31 @@ class UserService:
     @classmethod
     async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
         query = select(User).filter_by(**filters)
-        result = await cls._execute_query(session, query)
-        return result.scalars().first() if result else None
+        result = await cls._execute_read(session, query)
+        return result.scalar_one_or_none() if result else None
+
+    @classmethod
+    def _attach_cached(cls, session: AsyncSession, row: Dict) -> User:
+        user = session.identity_map.get(identity_key(User, row['id']))
+        if user is None:
+            user = User(**row)
+            make_transient_to_detached(user)
+            session.add(user)
+        else:
+            # A rollback expires loaded users, and loading them lazily is not possible under AsyncSession
+            for key in inspect(user).expired_attributes & row.keys():
+                set_committed_value(user, key, row[key])
+        return user
 
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+        row = await UserCache.get_by_id(user_id)
+        if row:
+            return cls._attach_cached(session, row)
+        user = await cls._fetch_user(session, id=user_id)
+        if user:
+            await UserCache.set(user)
+        return user
 
     @classmethod
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
@@ -54,25 +100,40 @@ class UserService:
 
     @classmethod
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
-        return await cls._fetch_user(session, email=email)
+        row = await UserCache.get_by_email(email)
+        if row:
+            return cls._attach_cached(session, row)
+        user = await cls._fetch_user(session, email=email)
+        if user:
+            await UserCache.set(user)
+        return user
 
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], notification_service: NotificationService) -> Optional[User]:
         try:
-            validated_data = UserCreate(**user_data).model_dump()
-            existing_email = await cls.get_by_email(session, validated_data['email'])
-            existing_nickname = await cls.get_by_nickname(session, validated_data['nickname']) # user must provide nickname as well
+            validated_data = UserCreate.model_validate(user_data).__dict__
+            query = select(User.email, User.nickname).where(
+                or_(User.email == validated_data['email'], User.nickname == validated_data['nickname']) # user must provide nickname as well
+            )
+            result = await cls._execute_read(session, query)
+            if result is None:
+                return None
+            existing_email = existing_nickname = False
+            for email, nickname in result:
+                existing_email = existing_email or email == validated_data['email']
+                existing_nickname = existing_nickname or nickname == validated_data['nickname']
             if existing_email:
                 logger.error("User with given email already exists.")
                 return None
             elif existing_nickname:
                 logger.error("User with given nickname already exists.")
                 return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            new_user = User(**validated_data)
-            new_user.verification_token = generate_verification_token()
-            session.add(new_user)
-            await session.commit()
+            validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+            query = insert(User).values(**validated_data).returning(User)
+            result = await cls._execute_write(session, query)
+            if result is None:
+                return None
+            new_user = result.scalar_one()
             notification_service.email_verification(new_user)
             return new_user
         except ValidationError as e:
@@ -82,14 +143,18 @@ class UserService:
     @classmethod
     async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
         try:
-            validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
+            validated_user = UserUpdate.model_validate(update_data)
+            validated_data = {field: validated_user.__dict__[field] for field in validated_user.model_fields_set}
             if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
+                validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+            query = (
+                update(User).where(User.id == user_id).values(**validated_data).returning(User)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = await cls._execute_write(session, query)
+            await UserCache.invalidate(user_id)
+            updated_user = result.scalar_one_or_none() if result else None
             if updated_user:
-                session.refresh(updated_user)  # Explicitly refresh the updated user object
                 logger.info(f"User {user_id} updated successfully.")
                 return updated_user
             else:
@@ -101,19 +166,35 @@ class UserService:
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if not user:
+        query = sa_delete(User).where(User.id == user_id)
+        result = await cls._execute_write(session, query)
+        await UserCache.invalidate(user_id)
+        if not result or result.rowcount == 0:
             logger.info(f"User with ID {user_id} not found.")
             return False
-        await session.delete(user)
-        await session.commit()
         return True
 
     @classmethod
-    async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
-        result = await cls._execute_query(session, query)
-        return result.scalars().all() if result else []
+    async def list_users(cls, session: AsyncSession, after_id: Optional[UUID] = None, limit: int = 10) -> Tuple[List[User], Optional[UUID]]:
+        """
+        List users ordered by id using keyset pagination.
+
+        :param session: The AsyncSession instance for database access.
+        :param after_id: Cursor returned with the previous page; the first page is returned when omitted.
+        :param limit: Maximum number of users to return.
+        :return: The page of users and the cursor for the next page, or None on the last page.
+        """
+        if limit < 1:
+            return [], None
+        query = select(User).order_by(User.id).limit(limit + 1)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await cls._execute_read(session, query)
+        users = result.scalars().all() if result else []
+        if len(users) > limit:
+            users = users[:limit]
+            return users, users[-1].id
+        return users, None
 
     @classmethod
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
@@ -122,22 +203,66 @@ class UserService:
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str, notification_service: NotificationService) -> Optional[User]:
         user = await cls.get_by_email(session, email)
-        if user:
-            if user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
+        if not user:
+            # Spend the same hashing work as a real login so unknown emails are not a fast path
+            await verify_password_async(password, await _get_dummy_hash())
+            return None
+        if user.is_locked:
+            return None
+        if await verify_password_async(password, user.hashed_password):
+            values = {'failed_login_attempts': 0, 'last_login_at': func.now()}
+            # The user may come from the cache, so the database has the final say on the lock and the hash
+            login_update = update(User).where(User.id == user.id, User.is_locked.is_not(True),
+                                              User.hashed_password == user.hashed_password)
+            if needs_rehash(user.hashed_password):
+                values['hashed_password'] = await hash_password_async(password)
             else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.lock_account()
-                    notification_service.account_locked(user)
-                session.add(user)
-                await session.commit()
+                # Skip the write when nothing would change but a last_login_at newer than the resolution
+                login_update = login_update.where(or_(
+                    func.coalesce(User.failed_login_attempts, 0) != 0,
+                    User.last_login_at.is_(None),
+                    User.last_login_at < func.now() - timedelta(seconds=settings.last_login_resolution_seconds),
+                ))
+            login_update = login_update.values(**values).returning(
+                User.id, User.failed_login_attempts, User.last_login_at, User.hashed_password, User.updated_at
+            ).cte("login_update")
+            query = (
+                select(User.is_locked, User.hashed_password.label('current_hashed_password'), login_update)
+                .outerjoin(login_update, login_update.c.id == User.id)
+                .where(User.id == user.id)
+            )
+            result = await cls._execute_write(session, query)
+            row = result.one_or_none() if result else None
+            if row is None:
+                return None
+            if row.is_locked:
+                set_committed_value(user, 'is_locked', True)
+                await UserCache.invalidate(user.id)
+                return None
+            if row.current_hashed_password != user.hashed_password:
+                # The password changed behind a stale copy, so verify again against the stored hash
+                set_committed_value(user, 'hashed_password', row.current_hashed_password)
+                await UserCache.invalidate(user.id)
+                return await cls.login_user(session, email, password, notification_service)
+            if row.id is not None:
+                for column in ('failed_login_attempts', 'last_login_at', 'hashed_password', 'updated_at'):
+                    set_committed_value(user, column, getattr(row, column))
+                await UserCache.invalidate(user.id)
+            return user
+        else:
+            attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+            query = (
+                update(User).where(User.id == user.id, User.is_locked.is_not(True))
+                .values(failed_login_attempts=attempts,
+                        is_locked=case((attempts >= settings.max_login_attempts, True), else_=User.is_locked))
+                .returning(User)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = await cls._execute_write(session, query)
+            await UserCache.invalidate(user.id)
+            updated_user = result.scalar_one_or_none() if result else None
+            if updated_user and updated_user.is_locked:
+                notification_service.account_locked(user)
         return None
 
     @classmethod
@@ -147,7 +272,7 @@ class UserService:
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str, notification_service: NotificationService) -> bool:
-        new_hashed_password = hash_password(new_password)
+        new_hashed_password = await hash_password_async(new_password)
         user = await cls.get_by_id(session, user_id)
         if user and user.email_verified:
             user.hashed_password = new_hashed_password
@@ -155,6 +280,7 @@ class UserService:
             user.is_locked = False  # Unlocking the user account, if locked
             session.add(user)
             await session.commit()
+            await UserCache.invalidate(user.id)
             notification_service.password_updated(user)
             return True
         return False
@@ -166,6 +292,7 @@ class UserService:
             user.verify_email()
             session.add(user)
             await session.commit()
+            await UserCache.invalidate(user.id)
             return True
         return False
 
@@ -178,9 +305,30 @@ class UserService:
         :return: The count of users.
         """
         query = select(func.count()).select_from(User)
-        result = await session.execute(query)
-        count = result.scalar()
-        return count
+        result = await cls._execute_read(session, query)
+        return result.scalar() if result else 0
+
+    @classmethod
+    async def count_estimate(cls, session: AsyncSession) -> int:
+        """
+        Estimate the number of users from PostgreSQL's planner statistics.
+
+        Reading pg_class.reltuples is O(1), unlike the full scan behind count(), so paginated
+        listings use this instead. Falls back to count() while the table has never been analyzed.
+
+        :param session: The AsyncSession instance for database access.
+        :return: The estimated count of users.
+        """
+        estimate = await UserCache.get_count_estimate()
+        if estimate is not None:
+            return estimate
+        query = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)").bindparams(table_name=User.__tablename__)
+        result = await cls._execute_read(session, query)
+        estimate = result.scalar() if result else None
+        if estimate is None or estimate < 0:
+            estimate = await cls.count(session)
+        await UserCache.set_count_estimate(estimate)
+        return estimate
     
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID, notification_service: NotificationService) -> bool:
@@ -189,20 +337,22 @@ class UserService:
             user.unlock_account()
             session.add(user)
             await session.commit()
+            await UserCache.invalidate(user.id)
             notification_service.account_unlocked(user)
             return True
         return False
     
     @classmethod
     async def create_default_db_admin(cls, session: AsyncSession):
-        admin = await cls.get_by_email(session, DB_ADMIN.email)
-        if not admin:
-            session.add(DB_ADMIN)
-            await session.commit()
+        query = pg_insert(User).values(**_get_db_admin_values()).on_conflict_do_nothing()
+        result = await cls._execute_write(session, query)
+        if result and result.rowcount:
             logger.info("Default admin created!")
     
     @classmethod
     def create_default_db_admin_sync(cls, session: Session):
-        session.add(DB_ADMIN)
+        query = pg_insert(User).values(**_get_db_admin_values()).on_conflict_do_nothing()
+        result = session.execute(query)
         session.commit()
-        logger.info("Default admin created in alembic upgrade!")
+        if result.rowcount:
+            logger.info("Default admin created in alembic upgrade!")
@@ -0,0 +1,117 @@
+from builtins import dict, int, str
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import json
+import logging
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime, inspect
+from app.models.user_model import User, UserRole
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+redis_client = Redis.from_url(settings.redis_url,
+                              socket_connect_timeout=settings.redis_connect_timeout,
+                              socket_timeout=settings.redis_socket_timeout)
+
+class UserCache:
+    """
+    Read-through Redis cache of user rows.
+
+    Rows are stored as JSON under ``user:id:<id>``; ``user:email:<email>`` only points at the id,
+    so invalidating a user by id is enough even when the email is not known.
+    """
+    columns = inspect(User).columns
+    count_estimate_key = "user:count_estimate"
+
+    @staticmethod
+    def _id_key(user_id) -> str:
+        return f"user:id:{user_id}"
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"user:email:{email}"
+
+    @classmethod
+    def _serialize(cls, user: User) -> str:
+        row = {}
+        for column in cls.columns:
+            value = getattr(user, column.key)
+            if isinstance(value, (UUID, datetime)):
+                value = value.isoformat() if isinstance(value, datetime) else str(value)
+            elif isinstance(value, UserRole):
+                value = value.name
+            row[column.key] = value
+        return json.dumps(row)
+
+    @classmethod
+    def _deserialize(cls, data: bytes) -> dict:
+        row = json.loads(data)
+        for column in cls.columns:
+            value = row.get(column.key)
+            if value is None:
+                continue
+            if column.key == 'id':
+                row[column.key] = UUID(value)
+            elif column.key == 'role':
+                row[column.key] = UserRole[value]
+            elif isinstance(column.type, DateTime):
+                row[column.key] = datetime.fromisoformat(value)
+        return row
+
+    @classmethod
+    async def get_by_id(cls, user_id) -> Optional[dict]:
+        try:
+            data = await redis_client.get(cls._id_key(user_id))
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
+            return None
+        return cls._deserialize(data) if data else None
+
+    @classmethod
+    async def get_by_email(cls, email: str) -> Optional[dict]:
+        try:
+            user_id = await redis_client.get(cls._email_key(email))
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
+            return None
+        if not user_id:
+            return None
+        row = await cls.get_by_id(user_id.decode())
+        # The pointer outlives email changes, so only trust rows that still carry this email
+        return row if row and row['email'] == email else None
+
+    @classmethod
+    async def set(cls, user: User):
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(cls._id_key(user.id), settings.user_cache_ttl, cls._serialize(user))
+                pipe.setex(cls._email_key(user.email), settings.user_cache_ttl, str(user.id))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
+
+    @classmethod
+    async def invalidate(cls, user_id):
+        try:
+            await redis_client.delete(cls._id_key(user_id))
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
+
+    @classmethod
+    async def get_count_estimate(cls) -> Optional[int]:
+        try:
+            data = await redis_client.get(cls.count_estimate_key)
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
+            return None
+        return int(data) if data is not None else None
+
+    @classmethod
+    async def set_count_estimate(cls, estimate: int):
+        try:
+            await redis_client.setex(cls.count_estimate_key, settings.user_count_cache_ttl, estimate)
+        except RedisError as e:
+            logger.warning(f"User cache unavailable: {e}")
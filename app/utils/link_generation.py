@@ -1,5 +1,5 @@
 from builtins import dict, int, max, str
-from typing import List, Callable
+from typing import List, Callable, Optional
 from urllib.parse import urlencode
 from uuid import UUID
 
@@ -16,6 +16,10 @@ def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationL
     query_string = f"skip={params['skip']}&limit={params['limit']}"
     return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
 
+def create_cursor_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
+    query_string = urlencode({key: str(value) for key, value in params.items() if value is not None})
+    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
     Generate navigation links for user actions.
@@ -46,3 +50,15 @@ def generate_pagination_links(request: Request, skip: int, limit: int, total_ite
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
     return links
+
+def generate_cursor_pagination_links(request: Request, after_id: Optional[UUID], limit: int, next_cursor: Optional[UUID]) -> List[PaginationLink]:
+    base_url = str(request.url).split('?')[0]
+    links = [
+        create_cursor_pagination_link("self", base_url, {'after_id': after_id, 'limit': limit}),
+        create_cursor_pagination_link("first", base_url, {'limit': limit}),
+    ]
+
+    if next_cursor is not None:
+        links.append(create_cursor_pagination_link("next", base_url, {'after_id': next_cursor, 'limit': limit}))
+
+    return links
@@ -1,19 +1,32 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
+import asyncio
+import os
 import secrets
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 from logging import getLogger
 
 # Set up logging
 logger = getLogger(__name__)
 
-def hash_password(password: str, rounds: int = 12) -> str:
+# Argon2id tuned to the OWASP recommendation of m=46 MiB, t=1, p=1
+password_hasher = PasswordHasher(time_cost=1, memory_cost=46 * 1024, parallelism=1, hash_len=32, salt_len=16)
+
+# Prefixes of legacy bcrypt hashes, still accepted by verify_password until rehashed
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+def hash_password(password: str) -> str:
     """
-    Hashes a password using bcrypt with a specified cost factor.
-    
+    Hashes a password using Argon2id with the tuned OWASP parameters.
+
     Args:
         password (str): The plain text password to hash.
-        rounds (int): The cost factor that determines the computational cost of hashing.
 
     Returns:
         str: The hashed password.
@@ -22,9 +35,7 @@ def hash_password(password: str, rounds: int = 12) -> str:
         ValueError: If hashing the password fails.
     """
     try:
-        salt = bcrypt.gensalt(rounds=rounds)
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed_password.decode('utf-8')
+        return password_hasher.hash(password)
     except Exception as e:
         logger.error("Failed to hash password: %s", e)
         raise ValueError("Failed to hash password") from e
@@ -32,10 +43,10 @@ def hash_password(password: str, rounds: int = 12) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain text password against a hashed password.
-    
+
     Args:
         plain_password (str): The plain text password to verify.
-        hashed_password (str): The bcrypt hashed password.
+        hashed_password (str): The Argon2 (or legacy bcrypt) hashed password.
 
     Returns:
         bool: True if the password is correct, False otherwise.
@@ -44,10 +55,61 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         ValueError: If the hashed password format is incorrect or the function fails to verify.
     """
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        if hashed_password.startswith(BCRYPT_PREFIXES):
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return password_hasher.verify(hashed_password, plain_password)
+    except VerifyMismatchError:
+        return False
     except Exception as e:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether a hashed password should be upgraded to the current Argon2id parameters.
+
+    Args:
+        hashed_password (str): The stored hashed password.
+
+    Returns:
+        bool: True if the hash is a legacy bcrypt hash or uses outdated Argon2 parameters.
+    """
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+@lru_cache(maxsize=1)
+def _get_hash_pool() -> ProcessPoolExecutor:
+    """Lazily start the worker processes used to hash passwords off the event loop."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+def shutdown_hash_pool():
+    """Stop the hashing worker processes, if they were ever started."""
+    if _get_hash_pool.cache_info().currsize:
+        _get_hash_pool().shutdown()
+        _get_hash_pool.cache_clear()
+
+async def _run_in_hash_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    pool = _get_hash_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # A crashed worker (e.g. OOM-killed) breaks the whole pool; replace it and retry once.
+        # Only the first caller to see this pool fail replaces it, so a newer pool is never orphaned.
+        if _get_hash_pool() is pool:
+            logger.warning("Password hashing pool is broken, starting a new one")
+            pool.shutdown(wait=False)
+            _get_hash_pool.cache_clear()
+        return await loop.run_in_executor(_get_hash_pool(), func, *args)
+
+async def hash_password_async(password: str) -> str:
+    """Runs hash_password in the hashing process pool so the event loop is not blocked."""
+    return await _run_in_hash_pool(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Runs verify_password in the hashing process pool so the event loop is not blocked."""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
 def generate_verification_token():
     return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
\ No newline at end of file
@@ -26,12 +26,14 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, scoped_session
 from faker import Faker
+from redis.exceptions import RedisError
 
 # Application-specific imports
 from app.main import app
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
 from app.dependencies import get_db, get_settings, get_notification_service
+from app.utils.cache import redis_client
 from app.utils.security import hash_password
 from app.services.email_service import EmailService
 from app.services.notification_service import NotificationService
@@ -87,6 +89,12 @@ async def setup_database():
         # you can comment out this line during development if you are debugging a single test
          await conn.run_sync(Base.metadata.drop_all)
     await engine.dispose()
+    # cached users outlive the dropped tables, so clear them and the loop-bound redis connections
+    try:
+        await redis_client.flushdb()
+    except RedisError:
+        pass
+    await redis_client.connection_pool.disconnect()
 
 @pytest.fixture(scope="function")
 async def db_session(setup_database):
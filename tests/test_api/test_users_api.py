@@ -209,6 +209,28 @@ async def test_list_users_as_admin(async_client, admin_token):
     assert response.status_code == 200
     assert 'items' in response.json()
 
+@pytest.mark.asyncio
+async def test_list_users_cursor_pagination(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", params={"limit": 10}, headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 10
+    assert first_page["next_cursor"] == first_page["items"][-1]["id"]
+    links = {link["rel"]: link["href"] for link in first_page["links"]}
+    assert set(links) == {"self", "first", "next"}
+    assert f"after_id={first_page['next_cursor']}" in links["next"]
+
+    response = await async_client.get("/users/", params={"after_id": first_page["next_cursor"], "limit": 10}, headers=headers)
+    assert response.status_code == 200
+    second_page_ids = {item["id"] for item in response.json()["items"]}
+    assert second_page_ids.isdisjoint(item["id"] for item in first_page["items"])
+
+@pytest.mark.asyncio
+async def test_list_users_rejects_zero_limit(async_client, admin_token):
+    response = await async_client.get("/users/", params={"limit": 0}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_list_users_as_manager(async_client, manager_token):
     response = await async_client.get(
@@ -22,6 +22,14 @@ async def test_default_db_admin_creation(db_session):
     assert stored_user.role == UserRole.ADMIN
     assert verify_password(settings.admin_password, stored_user.hashed_password)
 
+@pytest.mark.asyncio
+async def test_default_db_admin_creation_is_idempotent(db_session):
+    """Seeding the default db_admin twice keeps a single admin row"""
+    await UserService.create_default_db_admin(db_session)
+    await UserService.create_default_db_admin(db_session)
+    result = await db_session.execute(select(User).filter_by(email=settings.admin_email))
+    assert len(result.scalars().all()) == 1
+
 @pytest.mark.asyncio
 async def test_user_creation(db_session, verified_user):
     """Test that a user is correctly created and stored in the database."""
@@ -1,5 +1,9 @@
+import asyncio
+import threading
+from unittest.mock import patch
 import pytest
 
+from app.services.email_service import EmailService
 from app.utils.tasks import send_user_email
 from celery.result import AsyncResult
     
@@ -13,6 +17,31 @@ async def test_send_markdown_email(email_service):
     email_service.send_email('email_verification', 'Blank subject', user_data)
     # Manual verification in Mailtrap
 
+@pytest.mark.asyncio
+async def test_send_email_queues_off_the_event_loop():
+    user_data = {
+        "email": "test@example.com",
+        "name": "Test User",
+        "verification_url": "http://example.com/verify?token=abc123"
+    }
+    release, done = threading.Event(), threading.Event()
+    calls = []
+
+    def blocking_delay(subject, html_content, email):
+        # Only released once send_email has returned; the timeout keeps an inline call from hanging the test
+        calls.append((threading.get_ident(), release.wait(timeout=5), email))
+        done.set()
+
+    with patch("app.services.email_service.send_user_email") as task:
+        task.delay.side_effect = blocking_delay
+        EmailService().send_email('email_verification', 'Blank subject', user_data)
+        release.set()
+        assert await asyncio.to_thread(done.wait, 5)
+    thread_id, released, email = calls[0]
+    assert released, "send_email waited for the task to be queued"
+    assert thread_id != threading.get_ident(), "the task was queued on the event loop thread"
+    assert email == user_data["email"]
+
 """
 NOTE test only works when docker environment is up
 @pytest.mark.docker
@@ -1,8 +1,11 @@
 # test_security.py
 from builtins import RuntimeError, ValueError, isinstance, str
+import asyncio
+import os
 import pytest
 from app.schemas.user_schemas import UserCreate
-from app.utils.security import hash_password, verify_password
+import bcrypt
+from app.utils.security import _get_hash_pool, hash_password, hash_password_async, needs_rehash, shutdown_hash_pool, verify_password, verify_password_async
 
 def test_password_strength():
     """Test pasword strength"""
@@ -14,21 +17,17 @@ def test_password_strength():
             UserCreate.validate_password(weak)
 
 def test_hash_password():
-    """Test that hashing password returns a bcrypt hashed string."""
+    """Test that hashing password returns an Argon2id hashed string."""
     password = "secure_password"
     hashed = hash_password(password)
     assert hashed is not None
     assert isinstance(hashed, str)
-    assert hashed.startswith('$2b$')
+    assert hashed.startswith('$argon2id$v=19$m=47104,t=1,p=1$')
 
-def test_hash_password_with_different_rounds():
-    """Test hashing with different cost factors."""
+def test_hash_password_uses_random_salt():
+    """Test hashing the same password twice yields different hashes."""
     password = "secure_password"
-    rounds = 10
-    hashed_10 = hash_password(password, rounds)
-    rounds = 12
-    hashed_12 = hash_password(password, rounds)
-    assert hashed_10 != hashed_12, "Hashes should differ with different cost factors"
+    assert hash_password(password) != hash_password(password), "Hashes should differ with different salts"
 
 def test_verify_password_correct():
     """Test verifying the correct password."""
@@ -56,7 +55,7 @@ def test_verify_password_invalid_hash():
 def test_hash_password_edge_cases(password):
     """Test hashing various edge cases."""
     hashed = hash_password(password)
-    assert isinstance(hashed, str) and hashed.startswith('$2b$'), "Should handle edge cases properly"
+    assert isinstance(hashed, str) and hashed.startswith('$argon2id$'), "Should handle edge cases properly"
 
 def test_verify_password_edge_cases():
     """Test verifying passwords with edge cases."""
@@ -65,13 +64,51 @@ def test_verify_password_edge_cases():
     assert verify_password(password, hashed) is True
     assert verify_password("not empty", hashed) is False
 
-# This function tests the error handling when an internal error occurs in bcrypt
+# This function tests the error handling when an internal error occurs in argon2
 def test_hash_password_internal_error(monkeypatch):
-    """Test proper error handling when an internal bcrypt error occurs."""
-    def mock_bcrypt_gensalt(rounds):
+    """Test proper error handling when an internal argon2 error occurs."""
+    def mock_argon2_hash(self, password):
         raise RuntimeError("Simulated internal error")
 
-    monkeypatch.setattr("bcrypt.gensalt", mock_bcrypt_gensalt)
+    monkeypatch.setattr("argon2.PasswordHasher.hash", mock_argon2_hash)
     with pytest.raises(ValueError):
         hash_password("test")
 
+def test_verify_password_legacy_bcrypt():
+    """Test that legacy bcrypt hashes still verify and are flagged for rehashing."""
+    password = "secure_password"
+    legacy_hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+    assert verify_password(password, legacy_hashed) is True
+    assert verify_password("incorrect_password", legacy_hashed) is False
+    assert needs_rehash(legacy_hashed) is True
+
+def test_needs_rehash_current_parameters():
+    """Test that hashes made with the current parameters do not need rehashing."""
+    assert needs_rehash(hash_password("secure_password")) is False
+
+async def test_hash_and_verify_password_async():
+    """Test hashing and verifying passwords in the hashing process pool."""
+    password = "secure_password"
+    hashed = await hash_password_async(password)
+    assert hashed.startswith('$argon2id$')
+    assert await verify_password_async(password, hashed) is True
+    assert await verify_password_async("incorrect_password", hashed) is False
+
+async def test_verify_password_async_invalid_hash():
+    """Test that errors raised in the hashing process pool reach the caller."""
+    with pytest.raises(ValueError):
+        await verify_password_async("secure_password", "invalid_hash_format")
+
+async def test_hash_password_async_recovers_from_broken_pool():
+    """Test that a broken hashing pool is replaced instead of failing every later call."""
+    _get_hash_pool().submit(os._exit, 1)
+    hashed = await hash_password_async("secure_password")
+    assert await verify_password_async("secure_password", hashed) is True
+
+async def test_hash_password_async_replaces_broken_pool_once(caplog):
+    """Test that concurrent calls failing on the same broken pool replace it only once."""
+    shutdown_hash_pool()  # fresh workers are still starting when both calls are submitted
+    _get_hash_pool().submit(os._exit, 1)
+    hashes = await asyncio.gather(hash_password_async("secure_password"), hash_password_async("secure_password"))
+    assert all(hashed.startswith("$argon2id$") for hashed in hashes)
+    assert caplog.text.count("Password hashing pool is broken") == 1
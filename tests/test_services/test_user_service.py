@@ -1,10 +1,15 @@
 from builtins import range
+from unittest.mock import AsyncMock, patch
 import pytest
-from sqlalchemy import select
+from sqlalchemy import event, select, text, update
+from sqlalchemy.orm.attributes import set_committed_value
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
 from app.services.user_service import UserService
+from app.services.notification_service import NotificationService
+from app.utils.cache import UserCache
 from app.utils.nickname_gen import generate_nickname
+from app.utils.security import hash_password
 
 pytestmark = pytest.mark.asyncio
 
@@ -19,6 +24,8 @@ async def test_create_user_with_valid_data(db_session, notification_service):
     user = await UserService.create(db_session, user_data, notification_service)
     assert user is not None
     assert user.email == user_data["email"]
+    assert user.id is not None
+    assert user.verification_token is not None
 
 # Test creating a user with invalid data
 async def test_create_user_with_invalid_data(db_session, notification_service):
@@ -35,6 +42,14 @@ async def test_get_by_id_user_exists(db_session, user):
     retrieved_user = await UserService.get_by_id(db_session, user.id)
     assert retrieved_user.id == user.id
 
+# Test fetching a user by ID after the loaded instance was expired, as a rollback does
+async def test_get_by_id_expired_user(db_session, user):
+    user_id, email = user.id, user.email
+    await UserCache.set(user)
+    db_session.expire(user)
+    retrieved_user = await UserService.get_by_id(db_session, user_id)
+    assert retrieved_user.email == email
+
 # Test fetching a user by ID when the user does not exist
 async def test_get_by_id_user_does_not_exist(db_session):
     non_existent_user_id = "non-existent-id"
@@ -61,6 +76,17 @@ async def test_get_by_email_user_does_not_exist(db_session):
     retrieved_user = await UserService.get_by_email(db_session, "non_existent_email@example.com")
     assert retrieved_user is None
 
+# Test fetching a user by email is served from the cache on repeat lookups
+async def test_get_by_email_served_from_cache(db_session, user):
+    await UserService.get_by_email(db_session, user.email)
+    db_session.expunge_all()
+    with patch.object(UserService, "_fetch_user", new_callable=AsyncMock, return_value=None) as fetch_user:
+        cached_user = await UserService.get_by_email(db_session, user.email)
+    if fetch_user.called:
+        pytest.skip("redis is not available")
+    assert cached_user.id == user.id
+    assert cached_user.hashed_password == user.hashed_password
+
 # Test updating a user with valid data
 async def test_update_user_valid_data(db_session, user):
     new_email = "updated_email@example.com"
@@ -68,6 +94,20 @@ async def test_update_user_valid_data(db_session, user):
     assert updated_user is not None
     assert updated_user.email == new_email
 
+# Test updating a user is a single UPDATE ... RETURNING with no follow-up SELECT
+async def test_update_user_single_statement(db_session, user):
+    statements = []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        updated_user = await UserService.update(db_session, user.id, {"first_name": "Updated"})
+    finally:
+        event.remove(db_session.bind.sync_engine, "before_cursor_execute", record_statement)
+    assert updated_user.first_name == "Updated"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE") and "RETURNING" in statements[0]
+
 # Test updating a user with invalid data
 async def test_update_user_invalid_data(db_session, user):
     updated_user = await UserService.update(db_session, user.id, {"email": "invalidemail"})
@@ -86,11 +126,22 @@ async def test_delete_user_does_not_exist(db_session):
 
 # Test listing users with pagination
 async def test_list_users_with_pagination(db_session, users_with_same_role_50_users):
-    users_page_1 = await UserService.list_users(db_session, skip=0, limit=10)
-    users_page_2 = await UserService.list_users(db_session, skip=10, limit=10)
+    users_page_1, cursor_1 = await UserService.list_users(db_session, limit=10)
+    users_page_2, cursor_2 = await UserService.list_users(db_session, after_id=cursor_1, limit=10)
     assert len(users_page_1) == 10
     assert len(users_page_2) == 10
-    assert users_page_1[0].id != users_page_2[0].id
+    assert cursor_1 == users_page_1[-1].id
+    assert users_page_1[-1].id < users_page_2[0].id
+
+# Test a non-positive limit returns an empty page
+async def test_list_users_zero_limit(db_session, users_with_same_role_50_users):
+    assert await UserService.list_users(db_session, limit=0) == ([], None)
+
+# Test the last page of users has no next cursor
+async def test_list_users_last_page(db_session, users_with_same_role_50_users):
+    users, cursor = await UserService.list_users(db_session, limit=50)
+    assert len(users) == 50
+    assert cursor is None
 
 # Test registering a user with valid data
 async def test_register_user_with_valid_data(db_session, notification_service):
@@ -122,11 +173,51 @@ async def test_login_user_successful(db_session, verified_user, notification_ser
     logged_in_user = await UserService.login_user(db_session, user_data["email"], user_data["password"], notification_service)
     assert logged_in_user is not None
 
+# Test a repeat login within the last_login_at resolution does not rewrite the user row
+async def test_login_user_skips_redundant_write(db_session, verified_user, notification_service):
+    await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234", notification_service)
+    first_login_at = verified_user.last_login_at
+    assert first_login_at is not None
+    await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234", notification_service)
+    assert verified_user.last_login_at == first_login_at
+
+# Test a stale unlocked copy of the user cannot log into an account locked in the database
+async def test_login_user_locked_in_database(db_session, verified_user):
+    await db_session.execute(
+        update(User).where(User.id == verified_user.id).values(is_locked=True).execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+    assert verified_user.is_locked is False
+    notification_service = AsyncMock(spec=NotificationService)
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234", notification_service) is None
+    assert verified_user.is_locked is True
+    set_committed_value(verified_user, "is_locked", False)  # stale copy again, now for a failed login
+    assert await UserService.login_user(db_session, verified_user.email, "wrongpassword", notification_service) is None
+    notification_service.account_locked.assert_not_called()
+
+# Test a password changed in the database behind a loaded user rejects the old password
+async def test_login_user_password_changed_in_database(db_session, verified_user, notification_service):
+    await db_session.execute(
+        update(User).where(User.id == verified_user.id)
+        .values(hashed_password=hash_password("MyNewPassword$1234")).execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234", notification_service) is None
+    assert await UserService.login_user(db_session, verified_user.email, "MyNewPassword$1234", notification_service) is not None
+
 # Test user login with incorrect email
 async def test_login_user_incorrect_email(db_session, notification_service):
     user = await UserService.login_user(db_session, "nonexistentuser@noway.com", "Password123!", notification_service)
     assert user is None
 
+# Test user login with incorrect email still verifies a password hash
+async def test_login_user_incorrect_email_verifies_dummy_hash(db_session, notification_service):
+    with patch("app.services.user_service.verify_password_async", new_callable=AsyncMock, return_value=False) as verify:
+        user = await UserService.login_user(db_session, "nonexistentuser@noway.com", "Password123!", notification_service)
+    assert user is None
+    verify.assert_awaited_once()
+    assert verify.await_args.args[1].startswith("$argon2id$")
+
 # Test user login with incorrect password
 async def test_login_user_incorrect_password(db_session, user, notification_service):
     user = await UserService.login_user(db_session, user.email, "IncorrectPassword!", notification_service)
@@ -141,6 +232,16 @@ async def test_account_lock_after_failed_logins(db_session, verified_user, notif
     is_locked = await UserService.is_account_locked(db_session, verified_user.email)
     assert is_locked, "The account should be locked after the maximum number of failed login attempts."
 
+# Test the lock notification is sent once, when the account becomes locked
+async def test_account_lock_notifies_once(db_session, verified_user):
+    notification_service = AsyncMock(spec=NotificationService)
+    max_login_attempts = get_settings().max_login_attempts
+    for _ in range(max_login_attempts):
+        await UserService.login_user(db_session, verified_user.email, "wrongpassword", notification_service)
+
+    notification_service.account_locked.assert_called_once()
+    assert verified_user.failed_login_attempts == max_login_attempts
+
 # Test resetting a user's password
 async def test_reset_password(db_session, verified_user, notification_service):
     new_password = "NewPassword123!"
@@ -161,3 +262,10 @@ async def test_unlock_user_account(db_session, locked_user, notification_service
     assert unlocked, "The account should be unlocked"
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked, "The user should no longer be locked"
+
+# Test estimating the user count before and after the table is analyzed
+async def test_count_estimate(db_session, users_with_same_role_50_users):
+    assert await UserService.count_estimate(db_session) == 50
+    await db_session.execute(text("ANALYZE users"))
+    with patch.object(UserCache, "get_count_estimate", new_callable=AsyncMock, return_value=None):
+        assert await UserService.count_estimate(db_session) == 50